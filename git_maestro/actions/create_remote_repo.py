@@ -142,7 +142,7 @@ class CreateRemoteRepoAction(Action):
 
             # Check SSH configuration
             console.print("\n[cyan]Checking SSH configuration...[/cyan]")
-            ssh_config = SSHConfig()
+            ssh_config = SSHConfig.instance()
 
             if provider == "github":
                 if ssh_config.has_github_key():
@@ -27,8 +27,10 @@ class InitialCommitAction(Action):
         try:
             console.print("[bold cyan]Creating initial commit...[/bold cyan]")
 
-            # Check what files exist
-            untracked = state.repo.untracked_files
+            # The status cached when the menu was drawn may predate files the
+            # user created since, so look again before offering to commit them
+            state.refresh()
+            untracked = state.untracked_files
             console.print(
                 f"\n[yellow]Found {len(untracked)} untracked file(s)[/yellow]"
             )
@@ -237,7 +237,7 @@ class SetupRemoteAction(Action):
 
             # Check SSH configuration
             console.print("\n[cyan]Checking SSH configuration...[/cyan]")
-            ssh_config = SSHConfig()
+            ssh_config = SSHConfig.instance()
             if ssh_config.has_github_key():
                 console.print(
                     f"[green]✓ SSH key found: {ssh_config.github_key}[/green]"
@@ -339,7 +339,7 @@ class SetupRemoteAction(Action):
 
             # Check SSH configuration
             console.print("\n[cyan]Checking SSH configuration...[/cyan]")
-            ssh_config = SSHConfig()
+            ssh_config = SSHConfig.instance()
             if ssh_config.has_gitlab_key():
                 console.print(
                     f"[green]✓ SSH key found: {ssh_config.gitlab_key}[/green]"
@@ -1,5 +1,6 @@
 """Helper functions for generating repository descriptions."""
 
+import os
 import re
 import subprocess
 from pathlib import Path
@@ -99,11 +100,19 @@ def generate_description_with_ai(repo_path: Path, repo_name: str) -> Optional[st
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return None
 
+    # One directory listing finds both the README and the files to mention
+    try:
+        with os.scandir(repo_path) as entries:
+            files = [entry.name for entry in entries if entry.is_file()]
+    except OSError:
+        files = []
+    files_list = ", ".join(files[:20])
+
     # Build a prompt for Claude
     readme_content = ""
     for readme_name in ["README.md", "README.rst", "README.txt", "README"]:
-        readme_path = repo_path / readme_name
-        if readme_path.exists():
+        if readme_name in files:
+            readme_path = repo_path / readme_name
             try:
                 readme_content = readme_path.read_text(encoding="utf-8")[
                     :1000
@@ -112,13 +121,6 @@ def generate_description_with_ai(repo_path: Path, repo_name: str) -> Optional[st
             except Exception:
                 continue
 
-    # Get list of files in repo
-    try:
-        files = [f.name for f in repo_path.iterdir() if f.is_file()][:20]
-        files_list = ", ".join(files)
-    except Exception:
-        files_list = ""
-
     prompt = f"""Generate a concise one-sentence description (max 100 characters) for a GitHub repository named '{repo_name}'.
 
 Files in the repo: {files_list}
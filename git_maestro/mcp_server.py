@@ -1,7 +1,9 @@
 """MCP (Model Context Protocol) server for git-maestro."""
 
 import json
+import os
 import sys
+import time
 from pathlib import Path
 from typing import Any
 import inspect
@@ -9,6 +11,33 @@ import inspect
 from git_maestro.state import RepoState
 from git_maestro.actions import DownloadJobTracesAction, GetGithubActionsLogsAction
 
+# How long a RepoState may be reused across tool calls before re-detecting
+STATE_CACHE_TTL = 2.0
+
+# Files under .git whose changes (commit, checkout, staging) invalidate a cached RepoState
+STATE_SIGNATURE_FILES = ("HEAD", "index")
+
+# Shared error bodies for tool calls with missing arguments (never mutated)
+MISSING_RUN_ID_ERROR = {
+    "code": -32602,
+    "message": "Missing required parameter: run_id",
+}
+MISSING_RUN_JOB_ERROR = {
+    "code": -32602,
+    "message": "Missing required parameters: run_id, job_id",
+}
+
+
+def _state_signature(repo_path: str) -> tuple[int, ...]:
+    """Modification times of STATE_SIGNATURE_FILES, 0 for any that are missing."""
+    signature = []
+    for name in STATE_SIGNATURE_FILES:
+        try:
+            signature.append(os.stat(os.path.join(repo_path, ".git", name)).st_mtime_ns)
+        except OSError:
+            signature.append(0)
+    return tuple(signature)
+
 
 class MCPServer:
     """MCP server implementing git-maestro tools."""
@@ -16,7 +45,20 @@ class MCPServer:
     def __init__(self):
         self.version = "2024-11-05"
         self.dev_installation_error: str | None = None
+        self._state_cache: dict[str, tuple[float, tuple[int, ...], RepoState]] = {}
         self._check_dev_installation_safety()
+        if self.dev_installation_error:
+            # The rejection only differs by id, so serialize it once up to the id value
+            self._dev_error_prefix = json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "error": {
+                        "code": -32603,
+                        "message": self.dev_installation_error,
+                    },
+                    "id": None,
+                }
+            ).encode()[: -len(b"null}")]
         self.tools = {
             "download_job_traces": {
                 "description": "Download GitHub Actions job traces/logs for failed jobs in the current repository",
@@ -108,6 +150,18 @@ class MCPServer:
                 },
             },
         }
+        self._methods = {
+            "initialize": self.handle_initialize,
+            "tools/list": self.handle_list_tools,
+            "tools/call": self.handle_call_tool,
+        }
+        self._tool_handlers = {
+            "download_job_traces": self.call_download_job_traces,
+            "list_github_actions_runs": self.call_list_github_actions_runs,
+            "get_github_actions_run_jobs": self.call_get_github_actions_run_jobs,
+            "download_github_actions_job_logs": self.call_download_github_actions_job_logs,
+            "check_github_actions_job_status": self.call_check_github_actions_job_status,
+        }
 
     def _check_dev_installation_safety(self) -> None:
         """
@@ -121,6 +175,8 @@ class MCPServer:
             module_path = Path(module_file).parent.parent.resolve()
 
             # Check if this looks like a development installation (has .git, pyproject.toml, etc.)
+            # Two probes rather than a directory listing: in a normal install
+            # module_path is site-packages, which can be large
             is_dev = (
                 (module_path / ".git").exists()
                 or (module_path / "pyproject.toml").exists()
@@ -129,7 +185,11 @@ class MCPServer:
             if is_dev:
                 # Only refuse if Claude is actively working in this directory
                 claude_cwd = Path.cwd().resolve()
-                if claude_cwd == module_path or module_path in claude_cwd.parents:
+                module_str = str(module_path)
+                cwd_str = str(claude_cwd)
+                if cwd_str == module_str or cwd_str.startswith(
+                    module_str.rstrip(os.sep) + os.sep
+                ):
                     # Claude is working inside the git-maestro dev directory
                     self.dev_installation_error = (
                         f"git-maestro MCP refuses to start from a development installation "
@@ -141,68 +201,85 @@ class MCPServer:
             # Silently ignore any errors in this safety check
             pass
 
+    def _get_state(self, repo_path: str) -> RepoState:
+        """
+        Get the RepoState for a path, reusing a recent one if available.
+
+        A cached state is dropped early when HEAD or the index changed on disk.
+        """
+        # Resolved as a string, which is the form RepoState works with internally
+        key = os.path.realpath(repo_path)
+        now = time.monotonic()
+        signature = _state_signature(key)
+
+        cached = self._state_cache.get(key)
+        if (
+            cached is not None
+            and now - cached[0] < STATE_CACHE_TTL
+            and cached[1] == signature
+        ):
+            return cached[2]
+
+        # Drop expired entries so states (and their repo handles) for paths
+        # that aren't asked about again don't live as long as the server
+        expired = [
+            path
+            for path, (created, _, _) in self._state_cache.items()
+            if now - created >= STATE_CACHE_TTL
+        ]
+        for path in expired:
+            del self._state_cache[path]
+
+        state = RepoState(key)
+        self._state_cache[key] = (now, signature, state)
+        return state
+
+    def _send(self, data: bytes) -> None:
+        """Write one JSON-RPC frame to stdout."""
+        sys.stdout.buffer.write(data + b"\n")
+        sys.stdout.buffer.flush()
+
+    def _send_error(self, code: int, message: str) -> None:
+        """Write a JSON-RPC error that is not tied to a request id."""
+        error_response = {
+            "jsonrpc": "2.0",
+            "error": {
+                "code": code,
+                "message": message,
+            },
+            "id": None,
+        }
+        self._send(json.dumps(error_response).encode())
+
     def handle_message(self) -> None:
         """Handle incoming MCP messages from stdin."""
+        # Frames are parsed straight from the raw bytes; json.loads accepts them
+        lines = iter(sys.stdin.buffer.readline, b"")
+
         # If there's a dev installation error, reject all messages
         if self.dev_installation_error:
-            for line in sys.stdin:
+            for line in lines:
                 try:
                     message = json.loads(line)
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "error": {
-                            "code": -32603,
-                            "message": self.dev_installation_error,
-                        },
-                        "id": message.get("id"),
-                    }
-                    print(json.dumps(error_response), flush=True)
-                except json.JSONDecodeError:
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error",
-                        },
-                        "id": None,
-                    }
-                    print(json.dumps(error_response), flush=True)
+                    self._send(
+                        self._dev_error_prefix
+                        + json.dumps(message.get("id")).encode()
+                        + b"}"
+                    )
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    self._send_error(-32700, "Parse error")
                 except Exception as e:
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "error": {
-                            "code": -32603,
-                            "message": f"Internal error: {str(e)}",
-                        },
-                        "id": None,
-                    }
-                    print(json.dumps(error_response), flush=True)
+                    self._send_error(-32603, f"Internal error: {str(e)}")
         else:
-            for line in sys.stdin:
+            for line in lines:
                 try:
                     message = json.loads(line)
                     response = self.process_message(message)
-                    print(json.dumps(response), flush=True)
-                except json.JSONDecodeError:
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error",
-                        },
-                        "id": None,
-                    }
-                    print(json.dumps(error_response), flush=True)
+                    self._send(json.dumps(response).encode())
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    self._send_error(-32700, "Parse error")
                 except Exception as e:
-                    error_response = {
-                        "jsonrpc": "2.0",
-                        "error": {
-                            "code": -32603,
-                            "message": f"Internal error: {str(e)}",
-                        },
-                        "id": None,
-                    }
-                    print(json.dumps(error_response), flush=True)
+                    self._send_error(-32603, f"Internal error: {str(e)}")
 
     def process_message(self, message: dict[str, Any]) -> dict[str, Any]:
         """Process an MCP message."""
@@ -211,13 +288,8 @@ class MCPServer:
         params = message.get("params", {})
         msg_id = message.get("id")
 
-        if method == "initialize":
-            return self.handle_initialize(msg_id)
-        elif method == "tools/list":
-            return self.handle_list_tools(msg_id)
-        elif method == "tools/call":
-            return self.handle_call_tool(params, msg_id)
-        else:
+        handler = self._methods.get(method)
+        if handler is None:
             return {
                 "jsonrpc": jsonrpc,
                 "error": {
@@ -226,8 +298,9 @@ class MCPServer:
                 },
                 "id": msg_id,
             }
+        return handler(params, msg_id)
 
-    def handle_initialize(self, msg_id: Any) -> dict[str, Any]:
+    def handle_initialize(self, params: dict[str, Any], msg_id: Any) -> dict[str, Any]:
         """Handle initialize request."""
         return {
             "jsonrpc": "2.0",
@@ -244,7 +317,7 @@ class MCPServer:
             "id": msg_id,
         }
 
-    def handle_list_tools(self, msg_id: Any) -> dict[str, Any]:
+    def handle_list_tools(self, params: dict[str, Any], msg_id: Any) -> dict[str, Any]:
         """Handle tools/list request."""
         tools = [
             {
@@ -269,17 +342,8 @@ class MCPServer:
         tool_name = params.get("name")
         tool_input = params.get("arguments", {})
 
-        if tool_name == "download_job_traces":
-            return self.call_download_job_traces(tool_input, msg_id)
-        elif tool_name == "list_github_actions_runs":
-            return self.call_list_github_actions_runs(tool_input, msg_id)
-        elif tool_name == "get_github_actions_run_jobs":
-            return self.call_get_github_actions_run_jobs(tool_input, msg_id)
-        elif tool_name == "download_github_actions_job_logs":
-            return self.call_download_github_actions_job_logs(tool_input, msg_id)
-        elif tool_name == "check_github_actions_job_status":
-            return self.call_check_github_actions_job_status(tool_input, msg_id)
-        else:
+        handler = self._tool_handlers.get(tool_name)
+        if handler is None:
             return {
                 "jsonrpc": "2.0",
                 "error": {
@@ -288,6 +352,7 @@ class MCPServer:
                 },
                 "id": msg_id,
             }
+        return handler(tool_input, msg_id)
 
     def call_download_job_traces(
         self, tool_input: dict[str, Any], msg_id: Any
@@ -295,10 +360,9 @@ class MCPServer:
         """Call the download_job_traces tool."""
         try:
             repo_path = tool_input.get("repo_path", ".")
-            path = Path(repo_path).resolve()
 
             # Get the current state
-            state = RepoState(path)
+            state = self._get_state(repo_path)
 
             # Create and execute the action
             action = DownloadJobTracesAction()
@@ -318,6 +382,7 @@ class MCPServer:
                 }
 
             success = action.execute(state)
+            state.refresh()
 
             if success:
                 traces_path = state.get_fact("github_actions_traces_path", "")
@@ -364,10 +429,9 @@ class MCPServer:
         try:
             repo_path = tool_input.get("repo_path", ".")
             count = min(tool_input.get("count", 10), 50)  # Cap at 50
-            path = Path(repo_path).resolve()
 
             # Get the current state
-            state = RepoState(path)
+            state = self._get_state(repo_path)
 
             # Create and execute the action
             action = GetGithubActionsLogsAction()
@@ -393,7 +457,7 @@ class MCPServer:
                         },
                         {
                             "type": "text",
-                            "text": "runs: " + json.dumps(runs, indent=2),
+                            "text": "runs: " + json.dumps(runs),
                         },
                     ],
                 },
@@ -416,21 +480,17 @@ class MCPServer:
         """Get jobs for a specific GitHub Actions run."""
         try:
             run_id = tool_input.get("run_id")
-            if not run_id:
+            if run_id is None:
                 return {
                     "jsonrpc": "2.0",
-                    "error": {
-                        "code": -32602,
-                        "message": "Missing required parameter: run_id",
-                    },
+                    "error": MISSING_RUN_ID_ERROR,
                     "id": msg_id,
                 }
 
             repo_path = tool_input.get("repo_path", ".")
-            path = Path(repo_path).resolve()
 
             # Get the current state
-            state = RepoState(path)
+            state = self._get_state(repo_path)
 
             # Create and execute the action
             action = GetGithubActionsLogsAction()
@@ -456,7 +516,7 @@ class MCPServer:
                         },
                         {
                             "type": "text",
-                            "text": "jobs: " + json.dumps(jobs, indent=2),
+                            "text": "jobs: " + json.dumps(jobs),
                         },
                     ],
                 },
@@ -481,25 +541,22 @@ class MCPServer:
             run_id = tool_input.get("run_id")
             job_id = tool_input.get("job_id")
 
-            if not run_id or not job_id:
+            if run_id is None or job_id is None:
                 return {
                     "jsonrpc": "2.0",
-                    "error": {
-                        "code": -32602,
-                        "message": "Missing required parameters: run_id, job_id",
-                    },
+                    "error": MISSING_RUN_JOB_ERROR,
                     "id": msg_id,
                 }
 
             repo_path = tool_input.get("repo_path", ".")
-            path = Path(repo_path).resolve()
 
             # Get the current state
-            state = RepoState(path)
+            state = self._get_state(repo_path)
 
             # Create and execute the action
             action = GetGithubActionsLogsAction()
             log_file = action.download_job_logs(state, run_id, job_id)
+            state.refresh()
 
             if log_file:
                 return {
@@ -544,22 +601,18 @@ class MCPServer:
         """Check the status of a job or run without downloading logs."""
         try:
             run_id = tool_input.get("run_id")
-            if not run_id:
+            if run_id is None:
                 return {
                     "jsonrpc": "2.0",
-                    "error": {
-                        "code": -32602,
-                        "message": "Missing required parameter: run_id",
-                    },
+                    "error": MISSING_RUN_ID_ERROR,
                     "id": msg_id,
                 }
 
             job_id = tool_input.get("job_id")
             repo_path = tool_input.get("repo_path", ".")
-            path = Path(repo_path).resolve()
 
             # Get the current state
-            state = RepoState(path)
+            state = self._get_state(repo_path)
 
             # Create and execute the action
             action = GetGithubActionsLogsAction()
@@ -581,7 +634,7 @@ class MCPServer:
                     "content": [
                         {
                             "type": "text",
-                            "text": "status: " + json.dumps(status, indent=2),
+                            "text": "status: " + json.dumps(status),
                         }
                     ],
                 },
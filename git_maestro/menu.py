@@ -1,6 +1,6 @@
 """Menu system for git-maestro using rich and prompt-toolkit."""
 
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from rich.console import Console
 from rich.panel import Panel
 from rich.table import Table
@@ -24,9 +24,13 @@ class NumberValidator(Validator):
 
     def validate(self, document):
         text = document.text
-        if text and not text.isdigit():
+        if not text:
+            return
+        try:
+            choice = int(text)
+        except ValueError:
             raise ValidationError(message="Please enter a number")
-        if text and (int(text) < 0 or int(text) > self.max_choice):
+        if not 0 <= choice <= self.max_choice:
             raise ValidationError(
                 message=f"Please enter a number between 0 and {self.max_choice}"
             )
@@ -39,9 +43,35 @@ class Menu:
         self.state = state
         self.actions = actions
         self.applicable_actions: List[Action] = []
+        self._state_render: Optional[Tuple[tuple, Panel]] = None
+        self._menu_render: Optional[Tuple[tuple, Table]] = None
+        self._applicable_cache: Optional[Tuple[tuple, List[Action]]] = None
+        self._completers: Dict[int, WordCompleter] = {}
+
+    def _state_key(self) -> tuple:
+        """Everything display_state shows, used to decide whether to rebuild it."""
+        return (
+            self.state.path,
+            self.state.is_git_repo,
+            self.state.has_commits,
+            self.state.branch_name,
+            self.state.has_readme,
+            self.state.has_gitignore,
+            self.state.has_remote,
+            self.state.remote_url,
+            len(self.state.untracked_files or ()),
+            len(self.state.modified_files or ()),
+        )
 
     def display_state(self):
         """Display the current repository state."""
+        key = self._state_key()
+        if self._state_render is None or self._state_render[0] != key:
+            self._state_render = (key, self._build_state_panel())
+        console.print(self._state_render[1])
+
+    def _build_state_panel(self) -> Panel:
+        """Build the repository state panel."""
         table = Table(show_header=False, box=box.ROUNDED, border_style="cyan")
         table.add_column("Property", style="bold yellow")
         table.add_column("Value")
@@ -90,34 +120,31 @@ class Menu:
             if self.state.modified_files:
                 table.add_row("✏️  Modified Files", str(len(self.state.modified_files)))
 
-        panel = Panel(
+        return Panel(
             table,
             title="[bold magenta]🎼 Git Maestro - Repository State[/bold magenta]",
             border_style="magenta",
             padding=(1, 2),
         )
-        console.print(panel)
 
     def get_applicable_actions(self) -> List[Action]:
         """Get list of actions applicable to the current state."""
-        return [action for action in self.actions if action.is_applicable(self.state)]
-
-    def display_menu(self) -> bool:
-        """Display the action menu and handle user input. Returns True if user wants to continue."""
-        self.applicable_actions = self.get_applicable_actions()
-
-        if not self.applicable_actions:
-            console.print(
-                "\n[bold green]✨ Everything looks good! No actions needed.[/bold green]\n"
-            )
-            return False
-
+        key = self._state_key()
+        if self._applicable_cache is not None and self._applicable_cache[0] == key:
+            return self._applicable_cache[1]
+
+        applicable = [
+            action for action in self.actions if action.is_applicable(self.state)
+        ]
+        self._applicable_cache = (key, applicable)
+        return applicable
+
+    def _build_menu_table(self) -> Table:
+        """Build the table of applicable actions."""
         # Group actions by category
         setup_actions = [a for a in self.applicable_actions if a.category == "setup"]
         info_actions = [a for a in self.applicable_actions if a.category == "info"]
 
-        console.print("\n[bold cyan]Available Actions:[/bold cyan]\n")
-
         # Create menu table
         menu_table = Table(show_header=True, box=box.SIMPLE, border_style="blue")
         menu_table.add_column("#", style="bold cyan", width=4)
@@ -153,12 +180,36 @@ class Menu:
         menu_table.add_row("", "", "")  # Spacing row
         menu_table.add_row("0", "❌ Exit", "Exit git-maestro")
 
-        console.print(menu_table)
+        return menu_table
+
+    def _get_completer(self, max_choice: int) -> WordCompleter:
+        """Get a completer for choices 0..max_choice, built once per size."""
+        completer = self._completers.get(max_choice)
+        if completer is None:
+            completer = WordCompleter([str(i) for i in range(max_choice + 1)])
+            self._completers[max_choice] = completer
+        return completer
+
+    def display_menu(self) -> bool:
+        """Display the action menu and handle user input. Returns True if user wants to continue."""
+        self.applicable_actions = self.get_applicable_actions()
+
+        if not self.applicable_actions:
+            console.print(
+                "\n[bold green]✨ Everything looks good! No actions needed.[/bold green]\n"
+            )
+            return False
+
+        console.print("\n[bold cyan]Available Actions:[/bold cyan]\n")
+
+        key = tuple(id(a) for a in self.applicable_actions)
+        if self._menu_render is None or self._menu_render[0] != key:
+            self._menu_render = (key, self._build_menu_table())
+        console.print(self._menu_render[1])
         console.print()
 
         # Get user choice
-        choices = [str(i) for i in range(len(self.applicable_actions) + 1)]
-        completer = WordCompleter(choices)
+        completer = self._get_completer(len(self.applicable_actions))
         validator = NumberValidator(len(self.applicable_actions))
 
         try:
@@ -178,6 +229,8 @@ class Menu:
             selected_action = self.applicable_actions[choice_num - 1]
             console.print()
             success = selected_action.execute(self.state)
+            # Actions may record facts that change applicability
+            self._applicable_cache = None
 
             if success:
                 # Refresh state after successful action
@@ -1,14 +1,106 @@
 """SSH configuration detection and management."""
 
+import functools
+import glob
+import json
+import os
 import re
 import subprocess
 import platform
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatch
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Iterable, Iterator, Optional
 from rich.console import Console
 
 console = Console()
 
+# How long detected keys are reused (in seconds) before running detection again
+CACHE_TTL = 3600
+
+# How long (in seconds) keys fetched from a provider are reused for the same client
+REGISTERED_KEYS_TTL = 60
+
+# Default private key file names, in order of preference
+DEFAULT_KEY_NAMES = ("id_ed25519", "id_ecdsa", "id_rsa")
+
+# Nesting limit for Include directives (matches OpenSSH)
+MAX_INCLUDE_DEPTH = 16
+
+# Pseudo-keywords around an included file's directives; real keywords are
+# letters only, so these can't collide with them
+INCLUDE_START = "<include>"
+INCLUDE_END = "</include>"
+
+# One config line: a keyword separated from its value by whitespace and/or "=".
+# It is matched one line at a time and has no nested repetition, so matching is
+# linear in the line length however large the config file is.
+_DIRECTIVE_RE = re.compile(r"\s*([A-Za-z]+)(?:\s*=\s*|\s+)(.*)")
+
+# Process-wide instance handed out by SSHConfig.instance()
+_SINGLETON: Optional["SSHConfig"] = None
+_SINGLETON_LOCK = threading.Lock()
+
+
+def _host_matches(patterns: list[str], host: str) -> bool:
+    """Check a host against the patterns of a Host line, honouring !negation."""
+    matched = False
+    for pattern in patterns:
+        if pattern.startswith("!"):
+            if fnmatch(host, pattern[1:]):
+                return False
+        elif fnmatch(host, pattern):
+            matched = True
+    return matched
+
+
+# Result of the Windows `ssh -V` probe; None until probed
+_HAS_OPENSSH: Optional[bool] = None
+
+
+def _has_openssh() -> bool:
+    """Check whether an OpenSSH client is available (probed once per process)."""
+    global _HAS_OPENSSH
+    if _HAS_OPENSSH is None:
+        # Git for Windows and modern Windows 10/11 include OpenSSH
+        try:
+            subprocess.run(["ssh", "-V"], capture_output=True, timeout=2)
+            _HAS_OPENSSH = True
+        except (subprocess.SubprocessError, OSError):
+            _HAS_OPENSSH = False
+    return _HAS_OPENSSH
+
+
+@functools.lru_cache(maxsize=8)
+def _ssh_identity_files(
+    host: str, config_file: str, config_mtime_ns: int
+) -> tuple[str, ...]:
+    """
+    Run `ssh -G` for a host and return its unexpanded identityfile entries.
+
+    Memoized per process. The config file path and mtime are not used by the
+    lookup itself; they are part of the cache key so that editing the config
+    (or switching home directory) gets a fresh run.
+    """
+    # Output stays as bytes; only the identityfile values are decoded
+    result = subprocess.run(["ssh", "-G", host], capture_output=True, timeout=5)
+    if result.returncode != 0:
+        return ()
+    return tuple(
+        os.fsdecode(line[len(b"identityfile ") :].rstrip(b"\r"))
+        for line in result.stdout.split(b"\n")
+        if line.startswith(b"identityfile ")
+    )
+
+
+@functools.lru_cache(maxsize=16)
+def _read_public_key(path: str, mtime_ns: int, size: int) -> str:
+    """Read a public key file; the stat values in the key drop stale entries."""
+    with open(path, "r") as f:
+        return f.read().strip()
+
 
 class SSHConfig:
     """
@@ -24,23 +116,132 @@ class SSHConfig:
         self.config_file = self.ssh_dir / "config"
         self.github_key: Optional[Path] = None
         self.gitlab_key: Optional[Path] = None
-        self._detect_keys()
+        # provider -> (client, fetched_at, {key blob: registered key})
+        self._registered_keys: dict[str, tuple[Any, float, dict[str, Any]]] = {}
+        # Set when the parsed config pulls in other files, whose changes the
+        # cache key can't see
+        self._config_has_include = False
+        if not self._load_cache():
+            self._detect_keys()
+            self._save_cache()
+
+    @classmethod
+    def instance(cls) -> "SSHConfig":
+        """Get the shared SSHConfig, detecting keys on first use."""
+        global _SINGLETON
+        with _SINGLETON_LOCK:
+            if _SINGLETON is None:
+                _SINGLETON = cls()
+            return _SINGLETON
+
+    @classmethod
+    def reset(cls):
+        """Forget the shared SSHConfig and memoized ssh -G results."""
+        global _SINGLETON
+        with _SINGLETON_LOCK:
+            _SINGLETON = None
+        _ssh_identity_files.cache_clear()
+
+    @staticmethod
+    def _cache_path() -> Path:
+        """Location of the on-disk cache of detected keys."""
+        return Path.home() / ".cache" / "git-maestro" / "ssh_config.json"
+
+    @classmethod
+    def invalidate_cache(cls):
+        """Discard cached detection results so the next instance re-detects."""
+        try:
+            cls._cache_path().unlink()
+        except FileNotFoundError:
+            pass
+
+    def _cache_key(self) -> list:
+        """Values that must match for cached detection results to be reused."""
+        key = [self.platform]
+        # The ssh dir mtime changes whenever key files are added or removed
+        for path in (self.config_file, self.ssh_dir):
+            try:
+                key.append(path.stat().st_mtime_ns)
+            except OSError:
+                key.append(0)
+        return key
+
+    def _load_cache(self) -> bool:
+        """Load keys from the cache if it is fresh. Returns True on a hit."""
+        try:
+            with open(self._cache_path(), "r") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if (
+            not isinstance(cached, dict)
+            or cached.get("key") != self._cache_key()
+            or time.time() - cached.get("time", 0) > CACHE_TTL
+        ):
+            return False
+
+        github_key = cached.get("github_key")
+        gitlab_key = cached.get("gitlab_key")
+        self.github_key = Path(github_key) if github_key else None
+        self.gitlab_key = Path(gitlab_key) if gitlab_key else None
+        return True
+
+    def _save_cache(self):
+        """Write detected keys to the cache, replacing it atomically."""
+        if self._config_has_include:
+            return
+        cache_path = self._cache_path()
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {
+                        "key": self._cache_key(),
+                        "time": time.time(),
+                        "github_key": str(self.github_key) if self.github_key else None,
+                        "gitlab_key": str(self.gitlab_key) if self.gitlab_key else None,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            # The cache is only an optimization
+            pass
 
     def _detect_keys(self):
         """Detect SSH keys from SSH configuration."""
-        # Try using ssh -G command first (more reliable)
-        github_key_from_cmd = self._get_identity_from_ssh_command("github.com")
-        if github_key_from_cmd:
-            self.github_key = github_key_from_cmd
+        # Read .ssh/config in-process first; it usually answers both hosts
+        # without having to start any subprocess
+        if self.config_file.exists():
+            self._parse_ssh_config()
+
+        # Fall back to ssh -G for hosts the config didn't resolve; it also
+        # applies system-wide config and Match blocks
+        hosts = [
+            host
+            for host, key in (
+                ("github.com", self.github_key),
+                ("gitlab.com", self.gitlab_key),
+            )
+            if key is None
+        ]
+        if hosts:
+            if self.platform == "Windows":
+                # Probe once up front rather than from both worker threads
+                _has_openssh()
 
-        gitlab_key_from_cmd = self._get_identity_from_ssh_command("gitlab.com")
-        if gitlab_key_from_cmd:
-            self.gitlab_key = gitlab_key_from_cmd
+            # Each lookup mostly waits on an ssh subprocess, so run them at once
+            with ThreadPoolExecutor(max_workers=len(hosts)) as executor:
+                keys = dict(
+                    zip(hosts, executor.map(self._get_identity_from_ssh_command, hosts))
+                )
 
-        # Fall back to parsing .ssh/config if ssh -G didn't work
-        if not self.github_key or not self.gitlab_key:
-            if self.config_file.exists():
-                self._parse_ssh_config()
+            if keys.get("github.com"):
+                self.github_key = keys["github.com"]
+            if keys.get("gitlab.com"):
+                self.gitlab_key = keys["gitlab.com"]
 
         # Fall back to default key locations if still not found
         if not self.github_key:
@@ -61,42 +262,31 @@ class SSHConfig:
         Falls back gracefully if ssh command is not available.
         """
         try:
-            # On Windows, we might need to use different path handling
-            ssh_cmd = "ssh"
-            if self.platform == "Windows":
-                # Check if OpenSSH is available
-                # Git for Windows and modern Windows 10/11 include OpenSSH
-                try:
-                    subprocess.run(["ssh", "-V"], capture_output=True, timeout=2)
-                except (subprocess.TimeoutExpired, FileNotFoundError):
-                    # OpenSSH not available, skip this method
-                    return None
-
-            result = subprocess.run(
-                [ssh_cmd, "-G", host], capture_output=True, text=True, timeout=5
-            )
-
-            if result.returncode == 0:
-                # Parse the output for IdentityFile
-                for line in result.stdout.splitlines():
-                    if line.startswith("identityfile "):
-                        key_path = line.split(None, 1)[1]
-
-                        # Handle path expansion (~ and environment variables)
-                        if self.platform == "Windows":
-                            # Windows paths might use %USERPROFILE% or ~
-                            key_path = key_path.replace(
-                                "%USERPROFILE%", str(Path.home())
-                            )
-                        key_path = key_path.replace("~", str(Path.home()))
-
-                        key_path = Path(key_path)
-
-                        # ssh -G returns all possible identity files, pick the first one that exists
-                        if key_path.exists():
-                            return key_path
-
-        except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
+            if self.platform == "Windows" and not _has_openssh():
+                # OpenSSH not available, skip this method
+                return None
+
+            try:
+                config_mtime_ns = self.config_file.stat().st_mtime_ns
+            except OSError:
+                config_mtime_ns = 0
+
+            for key_path in _ssh_identity_files(
+                host, str(self.config_file), config_mtime_ns
+            ):
+                # Handle path expansion (~ and environment variables)
+                if self.platform == "Windows":
+                    # Windows paths might use %USERPROFILE% or ~
+                    key_path = key_path.replace("%USERPROFILE%", str(Path.home()))
+                key_path = key_path.replace("~", str(Path.home()))
+
+                key_path = Path(key_path)
+
+                # ssh -G returns all possible identity files, pick the first one that exists
+                if key_path.exists():
+                    return key_path
+
+        except (subprocess.SubprocessError, OSError):
             # ssh command not available or failed, will fall back to file parsing
             # This is normal on systems without OpenSSH or using PuTTY
             pass
@@ -104,64 +294,125 @@ class SSHConfig:
         return None
 
     def _parse_ssh_config(self):
-        """Parse SSH config file to find identity files for GitHub and GitLab."""
+        """
+        Parse SSH config file to find identity files for GitHub and GitLab.
+
+        Hosts are left unresolved, for ssh -G to answer, once the file has
+        something only ssh can evaluate: a Match block, or an IdentityFile
+        for that host using %-tokens or ${} environment variables.
+        """
         try:
-            with open(self.config_file, "r") as f:
-                content = f.read()
+            # Directives before the first Host line apply to every host
+            host_patterns = ["*"]
+            # Host patterns of the blocks enclosing each Include being read; an
+            # included file only applies where all of them match, and the
+            # enclosing block is back in effect once it ends
+            enclosing: list[list[str]] = []
+            # Hosts whose first matching IdentityFile couldn't be expanded here
+            undecided: set[str] = set()
+            for keyword, value in self._iter_directives(self.config_file):
+                if keyword == "host":
+                    # A new block; remember which hosts it applies to
+                    host_patterns = value.lower().split()
+                elif keyword == "match":
+                    # Match criteria can't be evaluated here, and a matching
+                    # block would come before anything later in the file
+                    break
+                elif keyword == INCLUDE_START:
+                    enclosing.append(host_patterns)
+                elif keyword == INCLUDE_END:
+                    host_patterns = enclosing.pop()
+                elif keyword == "identityfile":
+                    # Drop optional quotes
+                    value = value.strip('"')
+                    scopes = [*enclosing, host_patterns]
+                    for host, attr in (
+                        ("github.com", "github_key"),
+                        ("gitlab.com", "gitlab_key"),
+                    ):
+                        if getattr(self, attr) is not None or host in undecided:
+                            continue
+                        if not all(
+                            _host_matches(patterns, host) for patterns in scopes
+                        ):
+                            continue
+                        if "%" in value or "${" in value:
+                            undecided.add(host)
+                            continue
+                        # Expand ~ to home directory
+                        key_path = Path(value.replace("~", str(Path.home())))
+                        if key_path.exists():
+                            setattr(self, attr, key_path)
 
-            # Parse SSH config for GitHub
-            github_match = re.search(
-                r"Host\s+github\.com\s*\n((?:\s+\w+.*\n)*)", content, re.MULTILINE
-            )
-            if github_match:
-                host_config = github_match.group(1)
-                identity_match = re.search(r"IdentityFile\s+(.+)", host_config)
-                if identity_match:
-                    key_path = identity_match.group(1).strip()
-                    # Expand ~ to home directory
-                    key_path = Path(key_path.replace("~", str(Path.home())))
-                    if key_path.exists():
-                        self.github_key = key_path
-
-            # Parse SSH config for GitLab
-            gitlab_match = re.search(
-                r"Host\s+gitlab\.com\s*\n((?:\s+\w+.*\n)*)", content, re.MULTILINE
-            )
-            if gitlab_match:
-                host_config = gitlab_match.group(1)
-                identity_match = re.search(r"IdentityFile\s+(.+)", host_config)
-                if identity_match:
-                    key_path = identity_match.group(1).strip()
-                    key_path = Path(key_path.replace("~", str(Path.home())))
-                    if key_path.exists():
-                        self.gitlab_key = key_path
+                if (self.github_key is not None or "github.com" in undecided) and (
+                    self.gitlab_key is not None or "gitlab.com" in undecided
+                ):
+                    break
 
-        except Exception as e:
+        except (OSError, UnicodeDecodeError) as e:
             console.print(f"[dim]Note: Could not parse SSH config: {e}[/dim]")
 
+    def _iter_directives(
+        self, config_file: Path, depth: int = 0
+    ) -> Iterator[tuple[str, str]]:
+        """
+        Yield (keyword, value) pairs from an SSH config file, lowercasing keywords
+        and expanding Include directives in place.
+
+        Each included file's directives are bracketed by (INCLUDE_START, path)
+        and (INCLUDE_END, path) so the caller can scope them.
+        """
+        with open(config_file, "r") as f:
+            for line in f:
+                match = _DIRECTIVE_RE.match(line)
+                if not match:
+                    # Blank lines and comments
+                    continue
+                keyword, value = match.group(1).lower(), match.group(2).strip()
+
+                if keyword != "include":
+                    yield keyword, value
+                    continue
+                self._config_has_include = True
+                if depth >= MAX_INCLUDE_DEPTH:
+                    # Too deeply nested; ssh itself gives up here
+                    continue
+
+                # Relative includes are resolved against ~/.ssh, as ssh does
+                for pattern in value.split():
+                    pattern = pattern.replace("~", str(Path.home()))
+                    if not os.path.isabs(pattern):
+                        pattern = str(self.ssh_dir / pattern)
+                    for included in sorted(glob.glob(pattern)):
+                        if os.path.isfile(included):
+                            yield INCLUDE_START, included
+                            yield from self._iter_directives(Path(included), depth + 1)
+                            yield INCLUDE_END, included
+
     def _find_default_key(self) -> Optional[Path]:
-        """Find default SSH key if it exists."""
-        default_keys = [
-            self.ssh_dir / "id_rsa",
-            self.ssh_dir / "id_ed25519",
-            self.ssh_dir / "id_ecdsa",
-        ]
+        """Find default SSH key if it exists, preferring the most modern key type."""
+        try:
+            names = {entry.name for entry in os.scandir(self.ssh_dir)}
+        except OSError:
+            return None
 
-        for key_path in default_keys:
-            if key_path.exists():
-                return key_path
+        for key_name in DEFAULT_KEY_NAMES:
+            if key_name in names:
+                return self.ssh_dir / key_name
 
         return None
 
     def get_public_key_content(self, key_path: Path) -> Optional[str]:
         """Get the content of a public key file."""
-        pub_key_path = Path(str(key_path) + ".pub")
-        if not pub_key_path.exists():
+        pub_key_path = str(key_path) + ".pub"
+        try:
+            stat = os.stat(pub_key_path)
+        except OSError:
             return None
 
         try:
-            return pub_key_path.read_text().strip()
-        except Exception:
+            return _read_public_key(pub_key_path, stat.st_mtime_ns, stat.st_size)
+        except (OSError, UnicodeDecodeError):
             return None
 
     def has_github_key(self) -> bool:
@@ -202,6 +453,32 @@ class SSHConfig:
             else:
                 console.print("[yellow]⚠ No GitLab SSH key detected[/yellow]")
 
+    def _get_registered_keys(
+        self, provider: str, client, fetch: Callable[[], Iterable[Any]]
+    ) -> dict[str, Any]:
+        """
+        Get the keys registered with a provider, indexed by their base64 key blob.
+
+        Results are reused for a short time as long as the same client is passed.
+        """
+        now = time.monotonic()
+        cached = self._registered_keys.get(provider)
+        if (
+            cached is not None
+            and cached[0] is client
+            and now - cached[1] < REGISTERED_KEYS_TTL
+        ):
+            return cached[2]
+
+        keys: dict[str, Any] = {}
+        for key in fetch():
+            key_parts = key.key.split()
+            if len(key_parts) >= 2:
+                keys.setdefault(key_parts[1], key)
+
+        self._registered_keys[provider] = (client, now, keys)
+        return keys
+
     def verify_key_on_github(self, github_client) -> tuple[bool, str]:
         """
         Verify if the local SSH key is added to the GitHub account.
@@ -220,19 +497,17 @@ class SSHConfig:
             return (False, f"Could not read public key from {self.github_key}.pub")
 
         try:
-            # Get the key fingerprint from the public key content
             # GitHub API returns keys with their full content
-            user = github_client.get_user()
-            github_keys = user.get_keys()
+            github_keys = self._get_registered_keys(
+                "github", github_client, lambda: github_client.get_user().get_keys()
+            )
 
-            # Extract just the key part (without ssh-rsa and comment)
+            # Compare just the key part (without ssh-rsa and comment)
             local_key_parts = public_key.split()
             if len(local_key_parts) >= 2:
-                local_key = local_key_parts[1]
-
-                for key in github_keys:
-                    if local_key in key.key:
-                        return (True, f"SSH key '{key.title}' is registered on GitHub")
+                key = github_keys.get(local_key_parts[1])
+                if key is not None:
+                    return (True, f"SSH key '{key.title}' is registered on GitHub")
 
             return (False, "SSH key is not added to your GitHub account")
 
@@ -258,22 +533,54 @@ class SSHConfig:
 
         try:
             # Get current user's SSH keys from GitLab
-            keys = gitlab_client.user_keys.list()
+            gitlab_keys = self._get_registered_keys(
+                "gitlab",
+                gitlab_client,
+                lambda: gitlab_client.user_keys.list(get_all=True),
+            )
 
-            # Extract just the key part
+            # Compare just the key part
             local_key_parts = public_key.split()
             if len(local_key_parts) >= 2:
-                local_key = local_key_parts[1]
-
-                for key in keys:
-                    if local_key in key.key:
-                        return (True, f"SSH key '{key.title}' is registered on GitLab")
+                key = gitlab_keys.get(local_key_parts[1])
+                if key is not None:
+                    return (True, f"SSH key '{key.title}' is registered on GitLab")
 
             return (False, "SSH key is not added to your GitLab account")
 
         except Exception as e:
             return (False, f"Could not verify key: {e}")
 
+    def verify_keys(
+        self, github_client=None, gitlab_client=None
+    ) -> dict[str, tuple[bool, str]]:
+        """
+        Verify the local SSH keys on GitHub and/or GitLab concurrently.
+
+        Args:
+            github_client: Authenticated PyGithub client, or None to skip GitHub
+            gitlab_client: Authenticated python-gitlab client, or None to skip GitLab
+
+        Returns:
+            {"github": (is_verified, message), "gitlab": (is_verified, message)}
+            for each provider a client was given for
+        """
+        checks = {}
+        if github_client is not None:
+            checks["github"] = (self.verify_key_on_github, github_client)
+        if gitlab_client is not None:
+            checks["gitlab"] = (self.verify_key_on_gitlab, gitlab_client)
+        if not checks:
+            return {}
+
+        # Both checks are dominated by HTTPS round trips, so overlap them
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = {
+                provider: executor.submit(verify, client)
+                for provider, (verify, client) in checks.items()
+            }
+        return {provider: future.result() for provider, future in futures.items()}
+
     def __repr__(self):
         return (
             f"SSHConfig(github_key={self.github_key}, " f"gitlab_key={self.gitlab_key})"
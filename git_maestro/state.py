@@ -1,84 +1,362 @@
 """State detection module for git repositories."""
 
+import os
+import re
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional, Union
 import git
 from git.exc import InvalidGitRepositoryError
 
+README_FILES = frozenset({"README.md", "README.rst", "README.txt", "README"})
+
+# Names whose presence is only reported when they are regular files
+PROBED_FILES = README_FILES | {".gitignore"}
+
+# Entries of a bare repository, which has no .git directory of its own
+BARE_REPO_ENTRIES = frozenset({"HEAD", "objects", "refs"})
+
+# Extra environment for read-only git commands: don't take index.lock to write
+# back refreshed stat data, which could collide with the user's own git commands
+_GIT_ENV = {"GIT_OPTIONAL_LOCKS": "0"}
+
+# Open repositories, shared by RepoState instances for the same path while any is alive
+_REPO_CACHE: "weakref.WeakValueDictionary[str, git.Repo]" = (
+    weakref.WeakValueDictionary()
+)
+
+
+def _open_repo(path: str) -> git.Repo:
+    """Return the git.Repo for a resolved path, reusing one that is still open."""
+    repo = _REPO_CACHE.get(path)
+    if repo is None:
+        repo = _REPO_CACHE[path] = git.Repo(path)
+    return repo
+
+
+# Section headers in a git config file, e.g. `[remote "origin"]` or `[core]`;
+# the second group is set when the header has a quoted subsection
+_CONFIG_SECTION_RE = re.compile(r'\[\s*([A-Za-z0-9.-]+)(?:(\s+")|\s*\])')
+
+# Characters that make a config value need git's comment/quote/escape handling
+_CONFIG_VALUE_SPECIAL = frozenset(';#"\\')
+
+
+def _read_first_remote(config_path: str) -> Optional[tuple[bool, Optional[str]]]:
+    """
+    Scan a git config file for the first remote section and its url.
+
+    Only `[remote "<name>"]` sections define remotes; a bare `[remote]`
+    holds settings such as pushDefault. Returns (has_remote, remote_url), or
+    None when the answer needs GitPython: the file uses include directives,
+    the first remote has no url in its section, or the url isn't plain text.
+    """
+    in_remote = False
+    try:
+        with open(config_path, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith("["):
+                    if in_remote:
+                        # The first remote's url may be set elsewhere, or not at all
+                        return None
+                    match = _CONFIG_SECTION_RE.match(line)
+                    section = match.group(1).lower() if match else ""
+                    if section in ("include", "includeif"):
+                        return None
+                    in_remote = section == "remote" and match.group(2) is not None
+                elif in_remote:
+                    key, sep, value = line.partition("=")
+                    if sep and key.strip().lower() == "url":
+                        value = value.strip()
+                        if not _CONFIG_VALUE_SPECIAL.isdisjoint(value):
+                            # Comments, quoting and escapes follow git's rules
+                            return None
+                        return True, value
+    except OSError:
+        return None
+    return None if in_remote else (False, None)
+
+
+# Contents of a detached HEAD: a SHA-1 or SHA-256 object id
+_OBJECT_ID_RE = re.compile(rb"[0-9a-f]{40}|[0-9a-f]{64}")
+
+
+def _in_packed_refs(common_dir: str, ref: bytes) -> bool:
+    """Whether a ref is listed in the repository's packed-refs file."""
+    suffix = b" " + ref
+    try:
+        with open(os.path.join(common_dir, "packed-refs"), "rb") as f:
+            return any(line.rstrip().endswith(suffix) for line in f)
+    except OSError:
+        return False
+
+
+def _read_head(git_dir: str, common_dir: str) -> Optional[tuple[bool, Optional[str]]]:
+    """
+    Resolve HEAD from the files in the git directory, without running git.
+
+    Returns (has_commits, branch_name), or None when HEAD is in a form that
+    only git can resolve, such as with the reftable backend.
+    """
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "rb") as f:
+            head = f.read().strip()
+    except OSError:
+        return None
+
+    if not head.startswith(b"ref: "):
+        # Detached HEAD
+        return (True, None) if _OBJECT_ID_RE.fullmatch(head) else None
+
+    ref = head[5:].strip()
+    if not ref.startswith(b"refs/heads/"):
+        return None
+    # An unborn branch has neither a loose nor a packed ref yet
+    loose_ref = os.path.join(common_dir, os.fsdecode(ref))
+    if not os.path.isfile(loose_ref) and not _in_packed_refs(common_dir, ref):
+        # The reftable backend keeps a placeholder HEAD and no ref files at all,
+        # so it's only worth checking for once the ref wasn't found
+        if os.path.isdir(os.path.join(common_dir, "reftable")):
+            return None
+        return False, None
+    return True, os.fsdecode(ref[len(b"refs/heads/") :])
+
+
+def _parse_porcelain_status(
+    status: bytes,
+) -> tuple[tuple[str, ...], tuple[str, ...], bool]:
+    """
+    Parse `git status --porcelain=v1 -z` output.
+
+    Returns (untracked_files, modified_files, has_tracked_changes), where
+    modified files are those changed in the working tree relative to the index.
+    """
+    untracked_files = []
+    modified_files = []
+    has_tracked_changes = False
+
+    # Entries are classified on their raw status bytes; only paths get decoded
+    entries = iter(status.split(b"\0"))
+    for entry in entries:
+        if not entry:
+            continue
+        code = entry[:2]
+        if code == b"??":
+            untracked_files.append(os.fsdecode(entry[3:]))
+            continue
+
+        has_tracked_changes = True
+        if code[1:] != b" ":
+            modified_files.append(os.fsdecode(entry[3:]))
+        if b"R" in code or b"C" in code:
+            # Renames and copies are followed by the original path
+            next(entries, None)
+
+    return tuple(untracked_files), tuple(modified_files), has_tracked_changes
+
 
 class RepoState:
     """Represents the current state of a directory/git repository."""
 
+    # Lazily computed attributes, dropped by refresh() so they are looked up again
+    _CACHED_PROPERTIES = ("_remote", "_working_tree_status", "is_clean")
+
     def __init__(self, path: str = "."):
-        self.path = Path(path).resolve()
+        # Kept as a string too, for the os-level calls made on every detection
+        self._path_str = os.path.realpath(path)
+        self.path = Path(self._path_str)
         self.is_git_repo = False
         self.repo: Optional[git.Repo] = None
         self.has_commits = False
         self.has_readme = False
         self.has_gitignore = False
-        self.has_remote = False
-        self.remote_url: Optional[str] = None
         self.branch_name: Optional[str] = None
-        self.is_clean = True
-        self.untracked_files = []
-        self.modified_files = []
 
         # Facts dictionary - for storing gathered facts from expensive operations
         self.facts: dict = {}
 
         self._detect_state()
 
+    def _scan_root(self) -> tuple[set[str], set[str]]:
+        """
+        List the repository root once.
+
+        Returns (names, files): every entry name, and those of PROBED_FILES
+        that are regular files.
+        """
+        names = set()
+        files = set()
+        try:
+            with os.scandir(self._path_str) as entries:
+                for entry in entries:
+                    names.add(entry.name)
+                    # is_file() comes from the directory listing unless it's a symlink
+                    if entry.name in PROBED_FILES and entry.is_file():
+                        files.add(entry.name)
+        except OSError:
+            pass
+        return names, files
+
     def _detect_state(self):
         """Detect the current state of the repository."""
+        # A single directory read answers README, .gitignore and whether
+        # there is anything for git to open at all
+        names, files = self._scan_root()
+        self.has_readme = not files.isdisjoint(README_FILES)
+        self.has_gitignore = ".gitignore" in files
+
+        if ".git" not in names and not BARE_REPO_ENTRIES <= names:
+            self.is_git_repo = False
+            self.repo = None
+            self.has_commits = False
+            self.branch_name = None
+            return
+
         try:
-            self.repo = git.Repo(self.path)
+            self.repo = _open_repo(self._path_str)
             self.is_git_repo = True
 
-            # Check if there are any commits
-            try:
-                self.has_commits = len(list(self.repo.iter_commits(max_count=1))) > 0
-                self.branch_name = self.repo.active_branch.name
-            except (ValueError, git.exc.GitCommandError):
-                self.has_commits = False
-                self.branch_name = None
-
-            # Check for README
-            readme_files = ["README.md", "README.rst", "README.txt", "README"]
-            self.has_readme = any(
-                (self.path / readme).exists() for readme in readme_files
-            )
-
-            # Check for .gitignore
-            self.has_gitignore = (self.path / ".gitignore").exists()
-
-            # Check for remote
-            try:
-                remotes = self.repo.remotes
-                if remotes:
-                    self.has_remote = True
-                    self.remote_url = remotes[0].url
-            except Exception:
-                self.has_remote = False
-
-            # Check working tree status
-            if self.has_commits:
-                try:
-                    self.is_clean = not self.repo.is_dirty()
-                    self.untracked_files = self.repo.untracked_files
-                    self.modified_files = [
-                        item.a_path for item in self.repo.index.diff(None)
-                    ]
-                except (git.exc.GitCommandError, ValueError):
-                    # If there's an error checking status (e.g., no HEAD), set safe defaults
-                    self.is_clean = True
-                    self.untracked_files = []
-                    self.modified_files = []
+            head = _read_head(self.repo.git_dir, self.repo.common_dir)
+            if head is None:
+                head = self._resolve_head_with_git()
+            self.has_commits, self.branch_name = head
 
         except InvalidGitRepositoryError:
             self.is_git_repo = False
 
+    def _resolve_head_with_git(self) -> tuple[bool, Optional[str]]:
+        """(has_commits, branch_name) as reported by git itself."""
+        # Check if there are any commits (HEAD fails to resolve on an unborn branch)
+        try:
+            self.repo.git.rev_parse("--verify", "HEAD", q=True, env=_GIT_ENV)
+        except git.exc.GitCommandError:
+            return False, None
+
+        try:
+            return True, self.repo.active_branch.name
+        except TypeError:
+            # Detached HEAD
+            return True, None
+
+    # Remote and working tree status are only looked up when first accessed
+
+    @cached_property
+    def _remote(self) -> tuple[bool, Optional[str]]:
+        """(has_remote, remote_url) for the first configured remote."""
+        if not self.is_git_repo:
+            return False, None
+        # Reading the repository config directly avoids GitPython parsing the
+        # system and global config files as well
+        remote = _read_first_remote(os.path.join(self.repo.common_dir, "config"))
+        if remote is not None:
+            return remote
+        try:
+            remotes = self.repo.remotes
+            if remotes:
+                return True, remotes[0].url
+        except Exception:
+            pass
+        return False, None
+
+    @property
+    def has_remote(self) -> bool:
+        """Whether the repository has a remote configured."""
+        return self._remote[0]
+
+    @property
+    def remote_url(self) -> Optional[str]:
+        """URL of the first remote, if any."""
+        return self._remote[1]
+
+    @cached_property
+    def _working_tree_status(self) -> tuple[tuple[str, ...], tuple[str, ...], bool]:
+        """(untracked_files, modified_files, has_tracked_changes)."""
+        return self._read_working_tree_status()
+
+    def _read_working_tree_status(
+        self,
+    ) -> tuple[tuple[str, ...], tuple[str, ...], bool]:
+        """Run git status for _working_tree_status."""
+        if not self.is_git_repo:
+            return (), (), False
+        try:
+            # One `git status` answers cleanliness, untracked and modified files,
+            # and works on an unborn branch too. Rename detection doesn't change
+            # the answer, and submodules are compared by commit only so git does
+            # not run a status inside each of them.
+            status = self.repo.git.status(
+                "--porcelain=v1",
+                "-z",
+                "--untracked-files=all",
+                "--no-renames",
+                "--ignore-submodules=dirty",
+                stdout_as_string=False,
+                env=_GIT_ENV,
+            )
+            return _parse_porcelain_status(status)
+        except (git.exc.GitCommandError, ValueError):
+            # If there's an error checking status (e.g., no HEAD), use safe defaults
+            return (), (), False
+
+    @property
+    def untracked_files(self) -> tuple[str, ...]:
+        """Untracked files, relative to the repository root."""
+        return self._working_tree_status[0]
+
+    @property
+    def modified_files(self) -> tuple[str, ...]:
+        """Tracked files modified in the working tree."""
+        return self._working_tree_status[1]
+
+    @cached_property
+    def is_clean(self) -> bool:
+        """Whether tracked files have no uncommitted changes."""
+        if "_working_tree_status" in self.__dict__:
+            return not self._working_tree_status[2]
+        if not self.is_git_repo:
+            return True
+        try:
+            # Skipping untracked files spares git from walking ignored/new directories
+            return not self.repo.git.status(
+                "--porcelain",
+                "--untracked-files=no",
+                "--ignore-submodules=dirty",
+                env=_GIT_ENV,
+            )
+        except (git.exc.GitCommandError, ValueError):
+            return True
+
+    @classmethod
+    def snapshot(cls, paths: Iterable[Union[str, Path]]) -> list["RepoState"]:
+        """
+        Detect the state of several directories at once, in the order given.
+
+        Working tree status is loaded as part of the snapshot, so the git
+        status runs for all the repositories overlap.
+        """
+        paths = list(paths)
+        if not paths:
+            return []
+
+        def load(path: Union[str, Path]) -> "RepoState":
+            state = cls(path)
+            # Filled in directly: before Python 3.12, cached_property holds one
+            # lock across all instances and would serialize these calls
+            state.__dict__["_working_tree_status"] = state._read_working_tree_status()
+            return state
+
+        # Each state mostly waits on a git subprocess
+        max_workers = min(len(paths), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(load, paths))
+
     def refresh(self):
         """Refresh the state detection."""
+        for name in self._CACHED_PROPERTIES:
+            self.__dict__.pop(name, None)
         self._detect_state()
 
     def has_fact(self, fact_name: str) -> bool:
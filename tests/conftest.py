@@ -6,6 +6,17 @@ import shutil
 from pathlib import Path
 import git
 
+from git_maestro.ssh_config import SSHConfig
+from git_maestro.state import RepoState, _REPO_CACHE
+
+
+@pytest.fixture(autouse=True)
+def reset_ssh_config():
+    """Drop the shared SSHConfig so each test detects keys under its own home."""
+    SSHConfig.reset()
+    yield
+    SSHConfig.reset()
+
 
 @pytest.fixture
 def temp_dir():
@@ -19,6 +30,8 @@ def temp_dir():
 def git_repo(temp_dir):
     """Create a temporary git repository."""
     repo = git.Repo.init(temp_dir)
+    # Let RepoState reuse this handle rather than opening the repository again
+    _REPO_CACHE[str(temp_dir.resolve())] = repo
     yield repo, temp_dir
     # Cleanup happens via temp_dir fixture
 
@@ -39,11 +52,23 @@ def git_repo_with_commits(git_repo):
     yield repo, temp_dir
 
 
+@pytest.fixture
+def repo_state(git_repo_with_commits):
+    """RepoState for the repository with an initial commit."""
+    repo, temp_dir = git_repo_with_commits
+    return RepoState(temp_dir)
+
+
 @pytest.fixture
 def git_repo_with_remote(git_repo_with_commits):
     """Create a git repository with a remote configured."""
     repo, temp_dir = git_repo_with_commits
-    repo.create_remote("origin", "git@github.com:test/test.git")
+    # Written straight to the config; create_remote would run `git remote add`
+    with repo.config_writer() as config:
+        config.set_value('remote "origin"', "url", "git@github.com:test/test.git")
+        config.set_value(
+            'remote "origin"', "fetch", "+refs/heads/*:refs/remotes/origin/*"
+        )
     yield repo, temp_dir
 
 
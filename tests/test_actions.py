@@ -5,7 +5,9 @@ from git_maestro.actions import (
     InitRepoAction,
     AddReadmeAction,
     AddGitignoreAction,
+    InitialCommitAction,
 )
+from git_maestro.actions import initial_commit
 
 
 def test_init_repo_action_applicable(temp_dir):
@@ -25,10 +27,9 @@ def test_init_repo_action_not_applicable(git_repo):
     assert action.is_applicable(state) is False
 
 
-def test_add_readme_action_applicable(git_repo_with_commits):
+def test_add_readme_action_applicable(repo_state):
     """Test that AddReadmeAction is applicable when README is missing."""
-    repo, temp_dir = git_repo_with_commits
-    state = RepoState(temp_dir)
+    state = repo_state
     action = AddReadmeAction()
 
     assert action.is_applicable(state) is True
@@ -56,10 +57,9 @@ def test_add_readme_action_not_applicable_non_git(temp_dir):
     assert action.is_applicable(state) is False
 
 
-def test_add_gitignore_action_applicable(git_repo_with_commits):
+def test_add_gitignore_action_applicable(repo_state):
     """Test that AddGitignoreAction is applicable when .gitignore is missing."""
-    repo, temp_dir = git_repo_with_commits
-    state = RepoState(temp_dir)
+    state = repo_state
     action = AddGitignoreAction()
 
     assert action.is_applicable(state) is True
@@ -79,6 +79,24 @@ def test_add_gitignore_action_not_applicable(git_repo_with_commits):
     assert action.is_applicable(state) is False
 
 
+def test_initial_commit_includes_files_created_after_detection(
+    git_repo_no_commits, monkeypatch
+):
+    """Test that the initial commit sees files created after the state was read."""
+    repo, temp_dir = git_repo_no_commits
+    state = RepoState(temp_dir)
+    assert state.untracked_files == ()
+
+    (temp_dir / "late.txt").write_text("created while the menu was open")
+    # Accept every default: all files, default message, main branch
+    monkeypatch.setattr(
+        initial_commit, "prompt", lambda message, **kwargs: kwargs["default"]
+    )
+
+    assert InitialCommitAction().execute(state) is True
+    assert "late.txt" in repo.head.commit.tree
+
+
 def test_all_actions_have_required_attributes():
     """Test that all actions have required attributes."""
     actions = [
@@ -0,0 +1,30 @@
+"""Tests for repository description helpers."""
+
+import subprocess
+
+from git_maestro.description_helper import generate_description_with_ai
+
+
+def test_ai_prompt_lists_files_and_readme(temp_dir, monkeypatch):
+    """Test that the prompt names top-level files and quotes the README."""
+    (temp_dir / "README.md").write_text("# Widget\n\nA tool for widgets.")
+    (temp_dir / "main.py").write_text("print('hi')")
+    (temp_dir / "src").mkdir()
+
+    prompts = []
+
+    def fake_run(args, **kwargs):
+        if "input" in kwargs:
+            prompts.append(kwargs["input"])
+        return subprocess.CompletedProcess(args, 0, stdout="Widget tool\n")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+
+    assert generate_description_with_ai(temp_dir, "widget") == "Widget tool"
+    files_line = next(
+        line for line in prompts[0].splitlines() if line.startswith("Files")
+    )
+    assert "README.md" in files_line
+    assert "main.py" in files_line
+    assert "src" not in files_line
+    assert "A tool for widgets." in prompts[0]
@@ -0,0 +1,134 @@
+"""Tests for the MCP server message handling."""
+
+import io
+import json
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+from git_maestro.mcp_server import STATE_CACHE_TTL, MCPServer
+
+
+def test_initialize():
+    """Test that initialize returns server info."""
+    server = MCPServer()
+    response = server.process_message(
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize"}
+    )
+
+    assert response["id"] == 1
+    assert response["result"]["serverInfo"]["name"] == "git-maestro"
+
+
+def test_list_tools():
+    """Test that tools/list returns every registered tool."""
+    server = MCPServer()
+    response = server.process_message(
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+    )
+
+    names = {tool["name"] for tool in response["result"]["tools"]}
+    assert names == set(server.tools)
+
+
+def test_unknown_method():
+    """Test that unknown methods return a method-not-found error."""
+    server = MCPServer()
+    response = server.process_message({"jsonrpc": "2.0", "id": 3, "method": "bogus"})
+
+    assert response["error"]["code"] == -32601
+    assert response["id"] == 3
+
+
+def test_unknown_tool():
+    """Test that unknown tools return a tool-not-found error."""
+    server = MCPServer()
+    response = server.process_message(
+        {
+            "jsonrpc": "2.0",
+            "id": 4,
+            "method": "tools/call",
+            "params": {"name": "bogus", "arguments": {}},
+        }
+    )
+
+    assert response["error"]["code"] == -32601
+    assert "bogus" in response["error"]["message"]
+
+
+def test_every_tool_has_a_handler():
+    """Test that each advertised tool is dispatchable."""
+    server = MCPServer()
+
+    assert set(server.tools) == set(server._tool_handlers)
+
+
+def test_state_is_reused_across_calls(git_repo_with_commits):
+    """Test that repeated calls for the same repo share one RepoState."""
+    repo, temp_dir = git_repo_with_commits
+    server = MCPServer()
+
+    first = server._get_state(str(temp_dir))
+    second = server._get_state(str(temp_dir / "."))
+
+    assert first is second
+
+
+def test_state_is_redetected_after_commit(git_repo_with_commits):
+    """Test that a commit made between calls invalidates the cached RepoState."""
+    repo, temp_dir = git_repo_with_commits
+    server = MCPServer()
+
+    first = server._get_state(str(temp_dir))
+    (temp_dir / "second.txt").write_text("second")
+    repo.index.add(["second.txt"])
+    repo.index.commit("Second commit")
+    second = server._get_state(str(temp_dir))
+
+    assert first is not second
+
+
+def test_expired_states_are_pruned(git_repo_with_commits, tmp_path, monkeypatch):
+    """Test that states past their TTL don't stay cached for other paths."""
+    repo, temp_dir = git_repo_with_commits
+    server = MCPServer()
+    clock = iter([0.0, STATE_CACHE_TTL + 1])
+    monkeypatch.setattr(time, "monotonic", lambda: next(clock))
+
+    server._get_state(str(temp_dir))
+    server._get_state(str(tmp_path))
+
+    assert list(server._state_cache) == [os.path.realpath(tmp_path)]
+
+
+def test_handle_message_reads_and_writes_frames(monkeypatch, capsysbinary):
+    """Test the stdio loop answers each line, including malformed ones."""
+    server = MCPServer()
+    server.dev_installation_error = None
+    frames = b'{"jsonrpc": "2.0", "id": 1, "method": "initialize"}\nnot json\n'
+    monkeypatch.setattr(sys, "stdin", SimpleNamespace(buffer=io.BytesIO(frames)))
+
+    server.handle_message()
+
+    responses = [
+        json.loads(line) for line in capsysbinary.readouterr().out.splitlines()
+    ]
+    assert responses[0]["id"] == 1
+    assert responses[1]["error"]["code"] == -32700
+
+
+def test_missing_run_id():
+    """Test that tools requiring run_id reject calls without it."""
+    server = MCPServer()
+    response = server.process_message(
+        {
+            "jsonrpc": "2.0",
+            "id": 5,
+            "method": "tools/call",
+            "params": {"name": "get_github_actions_run_jobs", "arguments": {}},
+        }
+    )
+
+    assert response["error"]["code"] == -32602
+    assert response["id"] == 5
@@ -1,9 +1,10 @@
 """Tests for SSH configuration detection."""
 
+import os
 import pytest
 from pathlib import Path
 from unittest.mock import patch, MagicMock
-from git_maestro.ssh_config import SSHConfig
+from git_maestro.ssh_config import SSHConfig, _read_public_key
 
 
 @pytest.fixture
@@ -101,7 +102,7 @@ def test_ssh_command_detection(mock_run, mock_ssh_dir):
     # Mock ssh -G output
     mock_result = MagicMock()
     mock_result.returncode = 0
-    mock_result.stdout = f"identityfile {mock_ssh_dir}/id_rsa_github\nidentityfile {mock_ssh_dir}/id_rsa\n"
+    mock_result.stdout = f"identityfile {mock_ssh_dir}/id_rsa_github\nidentityfile {mock_ssh_dir}/id_rsa\n".encode()
     mock_run.return_value = mock_result
 
     # Create the key file
@@ -128,3 +129,365 @@ def test_ssh_command_failure_fallback(mock_run, mock_ssh_dir):
 
     # Should fall back to default key detection
     assert ssh_config.has_github_key() is True
+
+
+@patch("subprocess.run")
+def test_ssh_command_queries_both_hosts(mock_run, mock_ssh_dir):
+    """Test that ssh -G is run for both GitHub and GitLab."""
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = b""
+    mock_run.return_value = mock_result
+
+    SSHConfig()
+
+    hosts = {call.args[0][-1] for call in mock_run.call_args_list}
+    assert {"github.com", "gitlab.com"} <= hosts
+
+
+def test_detection_results_are_cached(mock_ssh_dir):
+    """Test that a second SSHConfig reuses the cached detection results."""
+    key_file = mock_ssh_dir / "id_ed25519"
+    key_file.write_text("fake key")
+    first = SSHConfig()
+
+    with patch.object(SSHConfig, "_detect_keys") as mock_detect:
+        second = SSHConfig()
+
+    mock_detect.assert_not_called()
+    assert second.github_key == first.github_key
+
+
+def test_cache_invalidation(mock_ssh_dir):
+    """Test that invalidate_cache forces detection to run again."""
+    SSHConfig()
+    SSHConfig.invalidate_cache()
+
+    with patch.object(SSHConfig, "_detect_keys") as mock_detect:
+        SSHConfig()
+
+    mock_detect.assert_called_once()
+
+
+def test_cache_ignored_when_ssh_dir_changes(mock_ssh_dir):
+    """Test that adding a key file invalidates cached results."""
+    first = SSHConfig()
+    assert first.has_github_key() is False
+
+    key_file = mock_ssh_dir / "id_rsa"
+    key_file.write_text("fake key")
+    # Make sure the directory mtime visibly changes
+    os.utime(mock_ssh_dir, ns=(0, 1))
+
+    second = SSHConfig()
+    assert second.has_github_key() is True
+
+
+@patch("subprocess.run")
+def test_ssh_config_parsing_shared_host_block(mock_run, mock_ssh_dir):
+    """Test a Host line listing several hosts and lowercase keywords."""
+    mock_run.side_effect = FileNotFoundError()
+    config_file = mock_ssh_dir / "config"
+    config_file.write_text("""# Personal keys
+host example.com
+    identityfile ~/.ssh/id_example
+
+Host github.com gitlab.com
+    User git
+    IdentityFile ~/.ssh/id_shared
+""")
+    (mock_ssh_dir / "id_example").write_text("fake example key")
+    (mock_ssh_dir / "id_shared").write_text("fake shared key")
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_shared"
+    assert ssh_config.gitlab_key.name == "id_shared"
+
+
+@patch("subprocess.run")
+def test_ssh_config_include_and_wildcards(mock_run, mock_ssh_dir):
+    """Test Include directives and wildcard Host patterns."""
+    mock_run.side_effect = FileNotFoundError()
+    (mock_ssh_dir / "config").write_text("Include config.d/*\n")
+    (mock_ssh_dir / "config.d").mkdir()
+    (mock_ssh_dir / "config.d" / "forges").write_text("""Host *.com !gitlab.com
+    IdentityFile ~/.ssh/id_forge
+
+Host gitlab.*
+    IdentityFile ~/.ssh/id_gitlab
+""")
+    (mock_ssh_dir / "id_forge").write_text("fake forge key")
+    (mock_ssh_dir / "id_gitlab").write_text("fake gitlab key")
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_forge"
+    assert ssh_config.gitlab_key.name == "id_gitlab"
+
+    # An Include under a Host block only applies to that host, and the
+    # enclosing block is back in effect once the included file ends
+    (mock_ssh_dir / "config").write_text("""Host work.example.com
+    Include work.conf
+    IdentityFile ~/.ssh/id_work_after
+
+Host *
+    IdentityFile ~/.ssh/id_forge
+""")
+    (mock_ssh_dir / "work.conf").write_text("""Host *
+    IdentityFile ~/.ssh/id_work
+""")
+    (mock_ssh_dir / "id_work").write_text("fake work key")
+    (mock_ssh_dir / "id_work_after").write_text("fake work key")
+    SSHConfig.invalidate_cache()
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_forge"
+    assert ssh_config.gitlab_key.name == "id_forge"
+
+
+@patch("subprocess.run")
+def test_included_config_changes_are_picked_up(mock_run, mock_ssh_dir):
+    """Test that editing an included file isn't hidden by the disk cache."""
+    mock_run.side_effect = FileNotFoundError()
+    (mock_ssh_dir / "config").write_text("Include config.d/*\n")
+    (mock_ssh_dir / "config.d").mkdir()
+    forges = mock_ssh_dir / "config.d" / "forges"
+    forges.write_text("Host *\n    IdentityFile ~/.ssh/id_old\n")
+    (mock_ssh_dir / "id_old").write_text("fake old key")
+    (mock_ssh_dir / "id_new").write_text("fake new key")
+
+    assert SSHConfig().github_key.name == "id_old"
+
+    forges.write_text("Host *\n    IdentityFile ~/.ssh/id_new\n")
+
+    assert SSHConfig().github_key.name == "id_new"
+
+
+@patch("subprocess.run")
+def test_ssh_config_match_block_defers_to_ssh(mock_run, mock_ssh_dir):
+    """Test that a Match block leaves the choice to ssh -G."""
+    (mock_ssh_dir / "config").write_text("""Match host github.com
+    IdentityFile ~/.ssh/id_gh
+
+Host *
+    IdentityFile ~/.ssh/id_rsa
+""")
+    (mock_ssh_dir / "id_gh").write_text("fake github key")
+    (mock_ssh_dir / "id_rsa").write_text("fake rsa key")
+
+    def ssh_g(args, **kwargs):
+        result = MagicMock()
+        result.returncode = 0
+        key = "id_gh" if args[-1] == "github.com" else "id_rsa"
+        result.stdout = f"identityfile {mock_ssh_dir}/{key}\n".encode()
+        return result
+
+    mock_run.side_effect = ssh_g
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_gh"
+    assert ssh_config.gitlab_key.name == "id_rsa"
+
+
+@patch("subprocess.run")
+def test_ssh_config_tokens_defer_to_ssh(mock_run, mock_ssh_dir):
+    """Test that IdentityFile tokens are left for ssh -G to expand."""
+    (mock_ssh_dir / "config").write_text("""Host github.com
+    IdentityFile ~/.ssh/id_%h
+
+Host *
+    IdentityFile ~/.ssh/id_rsa
+""")
+    (mock_ssh_dir / "id_github.com").write_text("fake github key")
+    (mock_ssh_dir / "id_rsa").write_text("fake rsa key")
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = f"identityfile {mock_ssh_dir}/id_github.com\n".encode()
+    mock_run.return_value = mock_result
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_github.com"
+    assert ssh_config.gitlab_key.name == "id_rsa"
+    hosts = [call.args[0][-1] for call in mock_run.call_args_list]
+    assert hosts == ["github.com"]
+
+
+@patch("subprocess.run")
+def test_ssh_config_avoids_ssh_command(mock_run, mock_ssh_dir):
+    """Test that ssh -G is not run for hosts resolved from the config file."""
+    config_file = mock_ssh_dir / "config"
+    config_file.write_text("""Host github.com gitlab.com
+    IdentityFile ~/.ssh/id_shared
+""")
+    (mock_ssh_dir / "id_shared").write_text("fake shared key")
+
+    ssh_config = SSHConfig()
+
+    mock_run.assert_not_called()
+    assert ssh_config.github_key.name == "id_shared"
+
+
+def test_shared_instance(mock_ssh_dir):
+    """Test that instance() returns one shared SSHConfig until reset."""
+    first = SSHConfig.instance()
+
+    assert SSHConfig.instance() is first
+
+    SSHConfig.reset()
+    assert SSHConfig.instance() is not first
+
+
+def test_get_public_key_content_after_change(mock_ssh_dir):
+    """Test that a rewritten public key is read again."""
+    key_file = mock_ssh_dir / "id_rsa"
+    key_file.write_text("fake private key")
+    pub_file = mock_ssh_dir / "id_rsa.pub"
+    pub_file.write_text("ssh-rsa AAAA old@example.com")
+
+    ssh_config = SSHConfig()
+    assert ssh_config.get_public_key_content(key_file) == "ssh-rsa AAAA old@example.com"
+
+    pub_file.write_text("ssh-ed25519 BBBB new@example.com")
+    assert (
+        ssh_config.get_public_key_content(key_file)
+        == "ssh-ed25519 BBBB new@example.com"
+    )
+
+
+def test_verify_key_on_github(mock_ssh_dir):
+    """Test matching the local key against keys registered on GitHub."""
+    key_file = mock_ssh_dir / "id_ed25519"
+    key_file.write_text("fake private key")
+    pub_file = mock_ssh_dir / "id_ed25519.pub"
+    pub_file.write_text("ssh-ed25519 AAAAlocal test@example.com")
+
+    other_key = MagicMock(key="ssh-ed25519 AAAAlocalextra", title="other")
+    local_key = MagicMock(key="ssh-ed25519 AAAAlocal", title="laptop")
+    github_client = MagicMock()
+    github_client.get_user.return_value.get_keys.return_value = [other_key, local_key]
+
+    ssh_config = SSHConfig()
+    assert ssh_config.verify_key_on_github(github_client) == (
+        True,
+        "SSH key 'laptop' is registered on GitHub",
+    )
+
+    # The registered keys are fetched once for repeated checks with one client
+    ssh_config.verify_key_on_github(github_client)
+    github_client.get_user.assert_called_once()
+
+
+def test_verify_key_on_gitlab_not_registered(mock_ssh_dir):
+    """Test a local key that is not registered on GitLab."""
+    key_file = mock_ssh_dir / "id_ed25519"
+    key_file.write_text("fake private key")
+    pub_file = mock_ssh_dir / "id_ed25519.pub"
+    pub_file.write_text("ssh-ed25519 AAAAlocal test@example.com")
+
+    gitlab_client = MagicMock()
+    gitlab_client.user_keys.list.return_value = [
+        MagicMock(key="ssh-ed25519 AAAAother", title="other")
+    ]
+
+    ssh_config = SSHConfig()
+    is_verified, _ = ssh_config.verify_key_on_gitlab(gitlab_client)
+    assert is_verified is False
+
+
+def test_verify_keys_both_providers(mock_ssh_dir):
+    """Test verifying keys on GitHub and GitLab in one call."""
+    key_file = mock_ssh_dir / "id_ed25519"
+    key_file.write_text("fake private key")
+    pub_file = mock_ssh_dir / "id_ed25519.pub"
+    pub_file.write_text("ssh-ed25519 AAAAlocal test@example.com")
+
+    github_client = MagicMock()
+    github_client.get_user.return_value.get_keys.return_value = [
+        MagicMock(key="ssh-ed25519 AAAAlocal", title="laptop")
+    ]
+    gitlab_client = MagicMock()
+    gitlab_client.user_keys.list.return_value = []
+
+    ssh_config = SSHConfig()
+    results = ssh_config.verify_keys(github_client, gitlab_client)
+
+    assert results["github"][0] is True
+    assert results["gitlab"][0] is False
+    assert ssh_config.verify_keys() == {}
+
+
+@patch("subprocess.run")
+def test_ssh_command_memoized(mock_run, mock_ssh_dir):
+    """Test that ssh -G runs once per host within a process."""
+    mock_result = MagicMock()
+    mock_result.returncode = 0
+    mock_result.stdout = b""
+    mock_run.return_value = mock_result
+
+    SSHConfig()
+    SSHConfig.invalidate_cache()
+    SSHConfig()
+
+    assert mock_run.call_count == 2
+
+
+@patch("subprocess.run")
+def test_ssh_config_parsing_equals_syntax(mock_run, mock_ssh_dir):
+    """Test directives written as Keyword=value."""
+    mock_run.side_effect = FileNotFoundError()
+    (mock_ssh_dir / "config").write_text(
+        'Host=github.com\n    IdentityFile = "~/.ssh/id_github"\n'
+    )
+    (mock_ssh_dir / "id_github").write_text("fake github key")
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_github"
+
+
+@patch("subprocess.run")
+def test_ssh_config_parsing_large_config(mock_run, mock_ssh_dir):
+    """Test a config with many host blocks before the GitHub one."""
+    mock_run.side_effect = FileNotFoundError()
+    blocks = [
+        f"Host host{i}.example.com\n    HostName 10.0.{i // 256}.{i % 256}\n"
+        f"    User deploy\n    IdentityFile ~/.ssh/id_host{i}\n"
+        for i in range(1000)
+    ]
+    blocks.append("Host github.com\n    IdentityFile ~/.ssh/id_github\n")
+    (mock_ssh_dir / "config").write_text("\n".join(blocks))
+    (mock_ssh_dir / "id_github").write_text("fake github key")
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_github"
+
+
+@patch("subprocess.run")
+def test_default_key_prefers_ed25519(mock_run, mock_ssh_dir):
+    """Test that ed25519 is preferred over RSA among default keys."""
+    mock_run.side_effect = FileNotFoundError()
+    (mock_ssh_dir / "id_rsa").write_text("fake rsa key")
+    (mock_ssh_dir / "id_ed25519").write_text("fake ed25519 key")
+
+    ssh_config = SSHConfig()
+
+    assert ssh_config.github_key.name == "id_ed25519"
+
+
+def test_get_public_key_content_is_memoized(mock_ssh_dir):
+    """Test that repeated public key lookups reuse the in-memory copy."""
+    key_file = mock_ssh_dir / "id_ed25519"
+    key_file.write_text("fake private key")
+    (mock_ssh_dir / "id_ed25519.pub").write_text("ssh-ed25519 AAAA test@example.com")
+
+    ssh_config = SSHConfig()
+    ssh_config.get_github_public_key()
+    hits = _read_public_key.cache_info().hits
+    ssh_config.get_gitlab_public_key()
+
+    assert _read_public_key.cache_info().hits == hits + 1
@@ -1,8 +1,22 @@
 """Tests for repository state detection."""
 
+import os
+
+import git
+import pytest
+
 from git_maestro.state import RepoState
 
 
+def _write(path, data: bytes):
+    """Write a small test file with a single open/write/close."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, data)
+    finally:
+        os.close(fd)
+
+
 def test_non_git_directory(temp_dir):
     """Test state detection in a non-git directory."""
     state = RepoState(temp_dir)
@@ -14,6 +28,22 @@ def test_non_git_directory(temp_dir):
     assert state.has_remote is False
 
 
+def test_non_git_directory_skips_git(temp_dir, monkeypatch):
+    """Test that a directory without .git is answered without opening a repo."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("git.Repo should not be opened")
+
+    monkeypatch.setattr(git, "Repo", fail)
+    _write(temp_dir / "README.md", b"# Test")
+
+    state = RepoState(temp_dir)
+    assert state.is_git_repo is False
+    assert state.has_readme is True
+    assert state.untracked_files == ()
+    assert state.is_clean is True
+
+
 def test_empty_git_repo(git_repo):
     """Test state detection in an empty git repository."""
     repo, temp_dir = git_repo
@@ -27,10 +57,9 @@ def test_empty_git_repo(git_repo):
     assert state.has_remote is False
 
 
-def test_git_repo_with_commits(git_repo_with_commits):
+def test_git_repo_with_commits(repo_state):
     """Test state detection in a git repository with commits."""
-    repo, temp_dir = git_repo_with_commits
-    state = RepoState(temp_dir)
+    state = repo_state
 
     assert state.is_git_repo is True
     assert state.has_commits is True
@@ -44,7 +73,7 @@ def test_git_repo_with_readme(git_repo_with_commits):
 
     # Create README
     readme = temp_dir / "README.md"
-    readme.write_text("# Test Project")
+    _write(readme, b"# Test Project")
 
     state = RepoState(temp_dir)
     assert state.has_readme is True
@@ -56,12 +85,23 @@ def test_git_repo_with_gitignore(git_repo_with_commits):
 
     # Create .gitignore
     gitignore = temp_dir / ".gitignore"
-    gitignore.write_text("*.pyc\n__pycache__/\n")
+    _write(gitignore, b"*.pyc\n__pycache__/\n")
 
     state = RepoState(temp_dir)
     assert state.has_gitignore is True
 
 
+def test_readme_directory_is_not_a_readme(git_repo_with_commits):
+    """Test that directories named like README or .gitignore are ignored."""
+    repo, temp_dir = git_repo_with_commits
+    (temp_dir / "README").mkdir()
+    (temp_dir / ".gitignore").mkdir()
+
+    state = RepoState(temp_dir)
+    assert state.has_readme is False
+    assert state.has_gitignore is False
+
+
 def test_git_repo_with_remote(git_repo_with_remote):
     """Test remote detection."""
     repo, temp_dir = git_repo_with_remote
@@ -71,16 +111,77 @@ def test_git_repo_with_remote(git_repo_with_remote):
     assert state.remote_url == "git@github.com:test/test.git"
 
 
+def test_git_repo_first_remote(git_repo_with_remote):
+    """Test that the first configured remote is reported."""
+    repo, temp_dir = git_repo_with_remote
+    repo.create_remote("upstream", "https://gitlab.com/test/test.git")
+
+    state = RepoState(temp_dir)
+    assert state.remote_url == "git@github.com:test/test.git"
+    assert state.get_remote_type() == "github"
+
+
+def test_git_repo_push_default_is_not_a_remote(git_repo_with_commits):
+    """Test that a bare [remote] section (remote.pushDefault) isn't a remote."""
+    repo, temp_dir = git_repo_with_commits
+    repo.git.config("remote.pushDefault", "origin")
+
+    state = RepoState(temp_dir)
+    assert state.has_remote is False
+    assert state.remote_url is None
+
+    repo.git.remote("add", "origin", "git@github.com:x/y.git")
+    state.refresh()
+    assert state.has_remote is True
+    assert state.remote_url == "git@github.com:x/y.git"
+    assert state.get_remote_type() == "github"
+
+
+def test_git_repo_remote_without_url(git_repo_with_commits):
+    """Test that a remote section without a url isn't reported as a remote."""
+    repo, temp_dir = git_repo_with_commits
+    repo.git.config("remote.origin.prune", "true")
+
+    state = RepoState(temp_dir)
+    assert state.has_remote is False
+    assert state.remote_url is None
+
+
+def test_git_repo_remote_url_with_comment(git_repo_with_commits):
+    """Test that an inline comment isn't part of the remote url."""
+    repo, temp_dir = git_repo_with_commits
+    config = temp_dir / ".git" / "config"
+    with open(config, "a") as f:
+        f.write('[remote "origin"]\n\turl = git@github.com:a/b.git ; primary\n')
+
+    state = RepoState(temp_dir)
+    assert state.remote_url == "git@github.com:a/b.git"
+
+
+def test_git_repo_remote_from_include(git_repo_with_commits):
+    """Test that remotes defined in included config files are found."""
+    repo, temp_dir = git_repo_with_commits
+    included = temp_dir / "remotes.gitconfig"
+    _write(included, b'[remote "origin"]\n\turl = https://gitlab.com/test/test.git\n')
+    with repo.config_writer() as config:
+        config.set_value("include", "path", str(included))
+
+    state = RepoState(temp_dir)
+    assert state.has_remote is True
+    assert state.remote_url == "https://gitlab.com/test/test.git"
+
+
 def test_git_repo_untracked_files(git_repo_with_commits):
     """Test untracked files detection."""
     repo, temp_dir = git_repo_with_commits
 
     # Create an untracked file
     new_file = temp_dir / "untracked.txt"
-    new_file.write_text("untracked content")
+    _write(new_file, b"untracked content")
 
     state = RepoState(temp_dir)
     assert "untracked.txt" in state.untracked_files
+    assert state.untracked_files is state.untracked_files
 
 
 def test_git_repo_modified_files(git_repo_with_commits):
@@ -89,22 +190,21 @@ def test_git_repo_modified_files(git_repo_with_commits):
 
     # Modify the existing file
     test_file = temp_dir / "test.txt"
-    test_file.write_text("modified content")
+    _write(test_file, b"modified content")
 
     state = RepoState(temp_dir)
     assert "test.txt" in state.modified_files
 
 
-def test_state_refresh(git_repo_with_commits):
+def test_state_refresh(repo_state):
     """Test that state can be refreshed."""
-    repo, temp_dir = git_repo_with_commits
-    state = RepoState(temp_dir)
+    state = repo_state
 
     assert state.has_readme is False
 
     # Add README
-    readme = temp_dir / "README.md"
-    readme.write_text("# Test")
+    readme = state.path / "README.md"
+    _write(readme, b"# Test")
 
     # Refresh state
     state.refresh()
@@ -120,5 +220,201 @@ def test_git_repo_no_commits_state(git_repo_no_commits):
     assert state.is_git_repo is True
     assert state.has_commits is False
     assert state.is_clean is True
-    assert state.untracked_files == []
-    assert state.modified_files == []
+    assert state.untracked_files == ()
+    assert state.modified_files == ()
+
+
+def test_git_repo_renamed_file(git_repo_with_commits):
+    """Test that a staged rename is not reported as untracked or modified."""
+    repo, temp_dir = git_repo_with_commits
+    repo.git.mv("test.txt", "renamed.txt")
+
+    state = RepoState(temp_dir)
+    assert state.is_clean is False
+    assert state.untracked_files == ()
+    assert state.modified_files == ()
+
+
+def test_state_refresh_working_tree(repo_state):
+    """Test that refresh picks up working tree changes already looked up."""
+    state = repo_state
+
+    assert state.untracked_files == ()
+
+    _write(state.path / "untracked.txt", b"untracked content")
+    state.refresh()
+    assert "untracked.txt" in state.untracked_files
+
+
+def test_untracked_files_keep_repo_clean(git_repo_with_commits):
+    """Test that untracked files alone don't make the working tree dirty."""
+    repo, temp_dir = git_repo_with_commits
+    _write(temp_dir / "untracked.txt", b"untracked content")
+
+    state = RepoState(temp_dir)
+    assert state.is_clean is True
+
+    _write(temp_dir / "test.txt", b"modified content")
+    state.refresh()
+    assert state.is_clean is False
+
+
+def test_git_repo_detached_head(git_repo_with_commits):
+    """Test that a detached HEAD has commits but no branch name."""
+    repo, temp_dir = git_repo_with_commits
+    repo.git.checkout(repo.head.commit.hexsha)
+
+    state = RepoState(temp_dir)
+    assert state.has_commits is True
+    assert state.branch_name is None
+
+
+def test_properties_are_memoized(git_repo_with_remote, monkeypatch):
+    """Test that repeated property reads don't invoke git again."""
+    repo, temp_dir = git_repo_with_remote
+    _write(temp_dir / "untracked.txt", b"untracked content")
+    state = RepoState(temp_dir)
+
+    calls = []
+    execute = git.cmd.Git.execute
+
+    def counting_execute(self, command, *args, **kwargs):
+        calls.append(command)
+        return execute(self, command, *args, **kwargs)
+
+    monkeypatch.setattr(git.cmd.Git, "execute", counting_execute)
+
+    for _ in range(3):
+        state.untracked_files
+        state.modified_files
+        state.is_clean
+        state.has_remote
+        state.remote_url
+    assert len(calls) == 1
+
+    state.refresh()
+    state.untracked_files
+    assert len(calls) == 2  # HEAD is read from disk, so only status runs
+
+
+def test_git_repo_no_commits_untracked_files(git_repo_no_commits):
+    """Test that untracked and staged files are reported before the first commit."""
+    repo, temp_dir = git_repo_no_commits
+    _write(temp_dir / "untracked.txt", b"untracked content")
+
+    state = RepoState(temp_dir)
+    assert state.untracked_files == ("untracked.txt",)
+    assert state.is_clean is True
+
+    repo.index.add(["untracked.txt"])
+    state.refresh()
+    assert state.untracked_files == ()
+    assert state.is_clean is False
+
+
+def test_symlinked_readme(git_repo_with_commits):
+    """Test that a README symlinked to a file is detected."""
+    repo, temp_dir = git_repo_with_commits
+    _write(temp_dir / "docs.md", b"# Docs")
+    (temp_dir / "README.md").symlink_to("docs.md")
+
+    state = RepoState(temp_dir)
+    assert state.has_readme is True
+
+
+def test_repo_handle_comes_from_fixture(git_repo):
+    """Test that RepoState reuses the handle the fixture already opened."""
+    repo, temp_dir = git_repo
+
+    assert RepoState(temp_dir).repo is repo
+
+
+def test_repo_handle_is_shared(git_repo_with_commits):
+    """Test that states for the same path reuse one git.Repo."""
+    repo, temp_dir = git_repo_with_commits
+    first = RepoState(temp_dir)
+    second = RepoState(temp_dir / ".")
+
+    assert first.repo is second.repo
+
+    second.refresh()
+    assert first.repo is second.repo
+
+
+def test_untracked_non_ascii_path(repo_state):
+    """Test that non-ASCII paths come back unquoted and decoded."""
+    _write(repo_state.path / "café.txt", b"untracked content")
+
+    repo_state.refresh()
+    assert repo_state.untracked_files == ("café.txt",)
+
+
+def test_git_repo_packed_refs(repo_state):
+    """Test that a branch whose ref only exists in packed-refs has commits."""
+    repo = repo_state.repo
+    branch = repo_state.branch_name
+    repo.git.pack_refs("--all")
+
+    repo_state.refresh()
+    assert repo_state.has_commits is True
+    assert repo_state.branch_name == branch
+
+
+def test_head_read_without_git(repo_state, monkeypatch):
+    """Test that HEAD is resolved from disk without running git."""
+    monkeypatch.setattr(
+        RepoState,
+        "_resolve_head_with_git",
+        lambda self: pytest.fail("git should not be needed to resolve HEAD"),
+    )
+    repo_state.repo.git.checkout("-b", "feature/nested")
+
+    repo_state.refresh()
+    assert repo_state.has_commits is True
+    assert repo_state.branch_name == "feature/nested"
+
+
+def test_status_does_not_write_index(repo_state):
+    """Test that reading status leaves the index file untouched."""
+    index = repo_state.path / ".git" / "index"
+    test_file = repo_state.path / "test.txt"
+    # Make git re-check the file's stat data without changing its content
+    os.utime(test_file, ns=(1, 1))
+    before = index.stat().st_mtime_ns
+
+    repo_state.refresh()
+    assert repo_state.modified_files == ()
+    assert index.stat().st_mtime_ns == before
+
+
+def test_reftable_repo_falls_back_to_git(git_repo, monkeypatch):
+    """Test that HEAD in a reftable layout is left for git to resolve."""
+    repo, temp_dir = git_repo
+    (temp_dir / ".git" / "reftable").mkdir()
+    monkeypatch.setattr(
+        RepoState, "_resolve_head_with_git", lambda self: (True, "main")
+    )
+
+    state = RepoState(temp_dir)
+    assert state.has_commits is True
+    assert state.branch_name == "main"
+
+
+def test_snapshot_batch(git_repo_with_commits, tmp_path):
+    """Test that snapshot returns one loaded state per path, in order."""
+    repo, temp_dir = git_repo_with_commits
+    _write(temp_dir / "untracked.txt", b"untracked content")
+    plain_dir = tmp_path / "plain"
+    plain_dir.mkdir()
+
+    states = RepoState.snapshot([temp_dir, str(plain_dir), temp_dir])
+
+    assert [state.path for state in states] == [
+        temp_dir.resolve(),
+        plain_dir.resolve(),
+        temp_dir.resolve(),
+    ]
+    assert states[0].untracked_files == ("untracked.txt",)
+    assert states[1].is_git_repo is False
+    assert "_working_tree_status" in states[2].__dict__
+    assert RepoState.snapshot([]) == []